@@ -0,0 +1,259 @@
+import argparse
+import gzip
+import hashlib
+import json
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import market_data
+from cache import RefreshQueueFull, cached, memory_report
+
+# Read-only JSON API over the analyses the dashboard computes, for other services.
+# Requests never wait on Google/Yahoo: a cold or expired key is loaded in the
+# background and the caller gets 202 (cold) or the stale copy (expired). When too
+# many refreshes are already pending, a cold key gets 503 instead of joining the queue.
+#
+#   python api.py --port 8502
+#   curl -H 'Accept-Encoding: gzip' 'localhost:8502/sentiment?keyword=Tesla'
+
+CHUNK_SIZE = 64 * 1024
+GZIP_LEVEL = 5
+RETRY_AFTER = 2
+
+# ----------------- Cached Data (shared with app.py, see cache.CACHE_CONFIG) -----------------
+@cached()
+def fetch_news_data(keyword, geo='US'):
+    return market_data.fetch_news_data(keyword, geo=geo)
+
+@cached()
+def get_geo_sentiment(keyword):
+    return market_data.get_geo_sentiment(keyword, fetch=fetch_news_data)
+
+@cached()
+def fetch_google_trends(keywords, timeframe='today 1-m', geo=''):
+    return market_data.fetch_google_trends(keywords, timeframe=timeframe, geo=geo)
+
+@cached()
+def fetch_stock_data(tickers, period='1y'):
+    return market_data.fetch_stock_data(tickers, period=period)
+
+# ----------------- Response Payloads -----------------
+def _json_default(obj):
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+def frame_to_rows(df, index_label=None):
+    if df is None or df.empty:
+        return []
+    if index_label:
+        df = df.reset_index().rename(columns={df.index.name or 'index': index_label})
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
+
+class Payload:
+    """
+    A response body encoded once per cache refresh: JSON split into chunks so large
+    result sets can be streamed, its gzipped form, and a content hash for the ETag.
+    """
+    __slots__ = ('chunks', 'gzip_chunks', 'size', 'etag')
+
+    def __init__(self, meta, rows):
+        self.chunks = list(self._encode(meta, rows))
+        self.size = sum(len(c) for c in self.chunks)
+        digest = hashlib.blake2b(digest_size=12)
+        for chunk in self.chunks:
+            digest.update(chunk)
+        self.etag = f'"{digest.hexdigest()}"'
+        self.gzip_chunks = self._compress(self.chunks)
+
+    @staticmethod
+    def _compress(chunks):
+        if len(chunks) == 1:
+            return [gzip.compress(chunks[0], GZIP_LEVEL)]
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        parts = [compressor.compress(chunk) for chunk in chunks] + [compressor.flush()]
+        return [part for part in parts if part]
+
+    @staticmethod
+    def _encode(meta, rows):
+        head = json.dumps(meta, default=_json_default)[:-1]
+        buf = [(head + (', ' if meta else '') + '"data": [').encode('utf-8')]
+        size = len(buf[0])
+        for i, row in enumerate(rows):
+            part = (', ' if i else '') + json.dumps(row, default=_json_default)
+            part = part.encode('utf-8')
+            buf.append(part)
+            size += len(part)
+            if size >= CHUNK_SIZE:
+                yield b''.join(buf)
+                buf, size = [], 0
+        buf.append(b']}')
+        yield b''.join(buf)
+
+@cached()
+def sentiment_payload(keyword, geo):
+    news = fetch_news_data(keyword, geo=geo)
+    scores = [item['sentiment_score'] for item in news]
+    summary = market_data.get_sentiment_summary(news)
+    return Payload({'keyword': keyword, 'geo': geo, 'summary': summary, 'articles': len(news), 'avg_score': sum(scores) / len(scores) if scores else None}, [])
+
+@cached()
+def news_payload(keyword, geo):
+    return Payload({'keyword': keyword, 'geo': geo}, fetch_news_data(keyword, geo=geo))
+
+@cached()
+def geo_payload(keyword):
+    return Payload({'keyword': keyword}, frame_to_rows(get_geo_sentiment(keyword)))
+
+@cached()
+def trends_payload(keywords, timeframe, geo):
+    return Payload({'keywords': list(keywords), 'timeframe': timeframe, 'geo': geo}, frame_to_rows(fetch_google_trends(list(keywords), timeframe=timeframe, geo=geo), index_label='date'))
+
+@cached()
+def stocks_payload(tickers, period):
+    data = fetch_stock_data(list(tickers), period=period)
+    close_prices = market_data.get_close_prices(data) if data is not None else None
+    return Payload({'tickers': list(tickers), 'period': period}, frame_to_rows(close_prices, index_label='date'))
+
+# ----------------- Request Parsing -----------------
+def _one(params, name, default=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"missing query parameter '{name}'")
+        return default
+    return values[0].strip()
+
+def _many(params, name, limit):
+    values = [v.strip() for raw in params.get(name, []) for v in raw.split(',') if v.strip()]
+    if not values:
+        raise ValueError(f"missing query parameter '{name}'")
+    if len(values) > limit:
+        raise ValueError(f"at most {limit} values allowed for '{name}'")
+    return tuple(values)
+
+ROUTES = {
+    '/sentiment': (sentiment_payload, lambda p: (_one(p, 'keyword'), _one(p, 'geo', 'US').upper())),
+    '/news': (news_payload, lambda p: (_one(p, 'keyword'), _one(p, 'geo', 'US').upper())),
+    '/geo': (geo_payload, lambda p: (_one(p, 'keyword'),)),
+    '/trends': (trends_payload, lambda p: (_many(p, 'keywords', 5), _one(p, 'timeframe', 'today 1-m'), _one(p, 'geo', '').upper())),
+    '/stocks': (stocks_payload, lambda p: (tuple(t.upper() for t in _many(p, 'tickers', 20)), _one(p, 'period', '1y'))),
+}
+
+def accepts_gzip(header):
+    # Honour q-values: "gzip;q=0" or "*;q=0" without gzip means no compression.
+    qvalues = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.strip().lower()] = q
+    return qvalues.get('gzip', qvalues.get('x-gzip', qvalues.get('*', 0.0))) > 0
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(',')]
+    return '*' in tags or any(t.removeprefix('W/') == etag for t in tags)
+
+# ----------------- HTTP Server -----------------
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MarketIntelligenceAPI'
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, obj, headers=()):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            return self.send_json(200, {'status': 'ok'})
+        if url.path == '/memory':
+            return self.send_json(200, memory_report())
+        route = ROUTES.get(url.path)
+        if route is None:
+            return self.send_json(404, {'error': 'not found', 'endpoints': sorted(ROUTES)})
+        payload_fn, parse = route
+        try:
+            args = parse(parse_qs(url.query))
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+
+        try:
+            entry = payload_fn.peek(*args)
+        except RefreshQueueFull:
+            return self.send_json(503, {'status': 'busy'}, [('Retry-After', str(RETRY_AFTER))])
+        if entry is None:
+            return self.send_json(202, {'status': 'pending'}, [('Retry-After', str(RETRY_AFTER))])
+        payload = entry.value
+        etag = f'W/{payload.etag}'
+        cache_headers = [('ETag', etag), ('Last-Modified', formatdate(entry.loaded_at, usegmt=True)), ('Cache-Control', f'max-age={entry.max_age()}'), ('Vary', 'Accept-Encoding')]
+        if etag_matches(self.headers.get('If-None-Match'), payload.etag):
+            self.send_response(304)
+            for name, value in cache_headers:
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        use_gzip = accepts_gzip(self.headers.get('Accept-Encoding'))
+        chunks = payload.gzip_chunks if use_gzip else payload.chunks
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in cache_headers:
+            self.send_header(name, value)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        if len(chunks) == 1:
+            self.send_header('Content-Length', str(len(chunks[0])))
+            self.end_headers()
+            self.wfile.write(chunks[0])
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve cached sentiment, geo, trends and stock analyses as JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--verbose', action='store_true', help="Log every request.")
+    args = parser.parse_args()
+
+    APIHandler.quiet = not args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), APIHandler)
+    server.daemon_threads = True
+    print(f"🚀 Serving on http://{args.host}:{args.port} ({', '.join(sorted(ROUTES) + ['/memory', '/health'])})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
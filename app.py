@@ -1,19 +1,16 @@
 import streamlit as st
 from pytrends.request import TrendReq
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
-import re
-from collections import Counter
 from io import BytesIO
 import plotly.express as px
-import yfinance as yf
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import spacy
 from fpdf import FPDF
-import numpy as np
+import market_data
+from cache import cached, memory_report
 
 # ----------------- Page Configuration -----------------
 st.set_page_config(page_title="Market Intelligence Dashboard", page_icon="🧠", layout="wide")
@@ -23,12 +20,7 @@ st.set_page_config(page_title="Market Intelligence Dashboard", page_icon="🧠",
 def load_spacy_model():
     return spacy.load("en_core_web_sm")
 
-@st.cache_resource
-def load_sentiment_analyzer():
-    return SentimentIntensityAnalyzer()
-
 nlp = load_spacy_model()
-analyzer = load_sentiment_analyzer()
 
 # ----------------- Custom CSS -----------------
 def load_css():
@@ -46,8 +38,9 @@ def load_css():
     """, unsafe_allow_html=True)
 
 # ----------------- Backend Data Fetching Functions (Cached) -----------------
+# TTLs and size budgets for every cached function live in cache.CACHE_CONFIG.
 # *** FIX: Re-adding the missing discovery functions ***
-@st.cache_data(ttl=3600)
+@cached()
 def fetch_trending_searches(country_code='US'):
     pytrends = TrendReq(hl='en-US', tz=330)
     try:
@@ -56,7 +49,7 @@ def fetch_trending_searches(country_code='US'):
     except Exception:
         return []
 
-@st.cache_data(ttl=1800)
+@cached()
 def fetch_top_headlines(country_code='US'):
     try:
         url = f"https://news.google.com/rss?hl=en-{country_code}&gl={country_code}&ceid={country_code}:en"
@@ -67,7 +60,7 @@ def fetch_top_headlines(country_code='US'):
     except Exception:
         return []
 
-@st.cache_data(ttl=3600)
+@cached()
 def get_google_suggestions(term):
     if not term:
         return []
@@ -77,60 +70,20 @@ def get_google_suggestions(term):
     except Exception:
         return []
 
-@st.cache_data(ttl=600)
+@cached()
 def fetch_google_trends(keywords, timeframe='today 1-m', geo=''):
-    if not keywords:
-        return None
-    pytrends = TrendReq(hl='en-US', tz=330)
-    try:
-        pytrends.build_payload(keywords, cat=0, timeframe=timeframe, geo=geo, gprop='')
-        data = pytrends.interest_over_time()
-        if 'isPartial' in data.columns:
-            data = data.drop(columns=['isPartial'])
-        return data
-    except Exception:
-        return None
+    return market_data.fetch_google_trends(keywords, timeframe=timeframe, geo=geo)
 
-@st.cache_data(ttl=600)
+@cached()
 def fetch_news_data(keyword, geo='US'):
-    news_items = []
-    try:
-        url = f"https://news.google.com/rss/search?q={keyword}&hl=en-{geo}&gl={geo}&ceid={geo}:en"
-        res = requests.get(url)
-        res.raise_for_status()
-        soup = BeautifulSoup(res.content, features="xml")
-        items = soup.find_all('item')
-        for item in items:
-            title = item.title.text
-            link = item.link.text
-            description = BeautifulSoup(item.description.text, "html.parser").get_text()
-            clean_desc = re.sub(r'\s+', ' ', description).strip()
-            if len(clean_desc) > 250:
-                clean_desc = clean_desc[:247] + "..."
-            combined_text = f"{title} {clean_desc}"
-            sentiment_score = analyzer.polarity_scores(combined_text)["compound"]
-            sentiment_category = ("Positive" if sentiment_score > 0.1 else "Negative" if sentiment_score < -0.1 else "Neutral")
-            news_items.append({'title': title, 'link': link, 'description': clean_desc, 'sentiment_category': sentiment_category, 'sentiment_score': sentiment_score, 'source': item.source.text if item.source else 'N/A'})
-    except Exception:
-        return []
-    return news_items
+    return market_data.fetch_news_data(keyword, geo=geo)
 
-@st.cache_data(ttl=600)
+@cached()
 def fetch_stock_data(tickers, period='1y'):
-    try:
-        tickers_str = " ".join(tickers)
-        if not tickers_str:
-            return None
-        data = yf.download(tickers_str, period=period, group_by='ticker', auto_adjust=True)
-        return data if not data.empty else None
-    except Exception:
-        return None
+    return market_data.fetch_stock_data(tickers, period=period)
 
 # ----------------- Analysis & Visualization Functions -----------------
-def get_sentiment_summary(news_items):
-    counts = Counter(item['sentiment_category'] for item in news_items)
-    total = sum(counts.values())
-    return {k: round((counts.get(k, 0) / total) * 100, 1) if total > 0 else 0 for k in ["Positive", "Neutral", "Negative"]}
+get_sentiment_summary = market_data.get_sentiment_summary
 
 def generate_wordcloud(text, title):
     if not text:
@@ -143,28 +96,18 @@ def generate_wordcloud(text, title):
     fig.patch.set_alpha(0.0)
     return fig
 
-COUNTRY_CODES_MAP = {'US': 'USA', 'GB': 'GBR', 'CA': 'CAN', 'AU': 'AUS', 'IN': 'IND'}
-
-@st.cache_data(ttl=1800)
+@cached()
 def get_geo_sentiment(keyword):
-    countries = {'US': 'United States', 'GB': 'United Kingdom', 'CA': 'Canada', 'AU': 'Australia', 'IN': 'India'}
-    geo_data = []
-    for code, name in countries.items():
-        news = fetch_news_data(keyword, geo=code)
-        if news:
-            summary_cats = get_sentiment_summary(news)
-            avg_score = np.mean([item['sentiment_score'] for item in news])
-            geo_data.append({'country': name, 'iso_alpha': COUNTRY_CODES_MAP.get(code), **summary_cats, 'avg_score': avg_score})
-    return pd.DataFrame(geo_data) if geo_data else None
+    return market_data.get_geo_sentiment(keyword, fetch=fetch_news_data)
 
-@st.cache_data(ttl=1800)
+@cached()
 def get_all_geo_data(keywords):
     all_data_list = []
     for keyword in keywords:
         geo_df = get_geo_sentiment(keyword)
         if geo_df is not None and not geo_df.empty:
-            geo_df['keyword'] = keyword
-            all_data_list.append(geo_df)
+            # Cached frames are shared, so tag a copy rather than the original.
+            all_data_list.append(geo_df.assign(keyword=keyword))
     if not all_data_list:
         return None
     return pd.concat(all_data_list, ignore_index=True)
@@ -307,6 +250,18 @@ with st.sidebar:
         else:
             st.write("Could not fetch headlines.")
 
+    with st.expander("🧮 Cache Memory Report"):
+        if st.button("Generate report", use_container_width=True):
+            report = memory_report()
+            rss = f"{report['rss_bytes'] / 1024**2:.0f} MB" if report['rss_bytes'] else "n/a"
+            ceiling = f"{report['rss_ceiling_bytes'] / 1024**2:.0f} MB" if report['rss_ceiling_bytes'] else "none"
+            st.caption(f"Process RSS: {rss} (ceiling: {ceiling}) · Cached: {report['cached_bytes'] / 1024**2:.1f} MB")
+            st.dataframe(pd.DataFrame([{k: v for k, v in c.items() if k != 'keys'} for c in report['caches']]), hide_index=True)
+            for c in report['caches']:
+                if c['keys']:
+                    st.write(f"**{c['name']}**")
+                    st.dataframe(pd.DataFrame(c['keys']), hide_index=True)
+
 keywords = st.session_state.keywords
 if not keywords:
     st.warning("Please add a brand/topic in the sidebar to begin analysis.")
@@ -356,11 +311,7 @@ else:
         with col2:
             st.subheader("Stock Market Performance")
             if stock_data is not None and not stock_data.empty:
-                if isinstance(stock_data.columns, pd.MultiIndex):
-                    close_prices = stock_data.xs('Close', level=1, axis=1)
-                else:
-                    close_prices = stock_data[['Close']]
-                
+                close_prices = market_data.get_close_prices(stock_data)
                 fig = px.line(close_prices, title="Stock Price (Close)")
                 fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font_color="white")
                 st.plotly_chart(fig, use_container_width=True)
@@ -441,11 +392,7 @@ else:
         
         stock_fig_for_pdf = None
         if stock_data is not None and not stock_data.empty:
-            if isinstance(stock_data.columns, pd.MultiIndex):
-                close_prices_pdf = stock_data.xs('Close', level=1, axis=1)
-            else:
-                close_prices_pdf = stock_data[['Close']]
-            stock_fig_for_pdf = px.line(close_prices_pdf)
+            stock_fig_for_pdf = px.line(market_data.get_close_prices(stock_data))
 
         pdf_bytes = create_pdf_report(keywords, trends_fig_for_pdf, sentiment_data, wordcloud_figs, stock_fig_for_pdf)
         st.download_button(label="📥 Download PDF Report", data=pdf_bytes, file_name=f"brand_report_{'_'.join(keywords)}.pdf", mime="application/pdf")
\ No newline at end of file
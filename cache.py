@@ -0,0 +1,399 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+
+# In-process TTL + LRU cache shared by the dashboard and the headless services.
+# Unlike st.cache_data it works outside a Streamlit script run, bounds every cache
+# by the estimated size of its values, and can answer without blocking: `peek`
+# returns whatever is cached (even if stale) and refreshes it in the background.
+
+MB = 1024 * 1024
+
+# ----------------- Cache Configuration -----------------
+# TTL (seconds) and size budget (bytes) for every cached function, by name.
+CACHE_CONFIG = {
+    # app.py / api.py data fetchers
+    'fetch_trending_searches': {'ttl': 3600, 'max_bytes': 1 * MB},
+    'fetch_top_headlines': {'ttl': 1800, 'max_bytes': 1 * MB},
+    'get_google_suggestions': {'ttl': 3600, 'max_bytes': 4 * MB},
+    'fetch_google_trends': {'ttl': 600, 'max_bytes': 32 * MB},
+    'fetch_news_data': {'ttl': 600, 'max_bytes': 64 * MB},
+    'fetch_stock_data': {'ttl': 600, 'max_bytes': 64 * MB},
+    'get_geo_sentiment': {'ttl': 1800, 'max_bytes': 8 * MB},
+    'get_all_geo_data': {'ttl': 1800, 'max_bytes': 16 * MB},
+    # api.py encoded responses
+    'sentiment_payload': {'ttl': 600, 'max_bytes': 4 * MB},
+    'news_payload': {'ttl': 600, 'max_bytes': 64 * MB},
+    'geo_payload': {'ttl': 1800, 'max_bytes': 8 * MB},
+    'trends_payload': {'ttl': 600, 'max_bytes': 32 * MB},
+    'stocks_payload': {'ttl': 600, 'max_bytes': 64 * MB},
+}
+DEFAULT_TTL = 600
+DEFAULT_MAX_BYTES = 16 * MB
+
+# When the process RSS exceeds this, least recently used entries are dropped
+# across all caches. 0 disables the check. This is a best-effort target, not a
+# hard limit: the allocator often keeps freed memory and models/libraries count
+# towards RSS too. So checks are spaced out, each round evicts at most a fraction
+# of what is cached, and eviction pauses while the last round did not lower RSS.
+RSS_CEILING_BYTES = int(float(os.environ.get('RSS_CEILING_MB', 0)) * MB)
+RSS_CHECK_INTERVAL = 5
+RSS_EVICT_FRACTION = 0.25
+RSS_EVICT_COOLDOWN = 60
+
+REFRESH_WORKERS = 8
+# Background refreshes queued or running at once, across all caches. Beyond this,
+# peek() on an uncached key raises RefreshQueueFull instead of queueing more work.
+MAX_PENDING_REFRESHES = 64
+
+CACHES = {}
+_registry_lock = threading.Lock()
+_refresh_pool = None
+_refresh_slots = threading.BoundedSemaphore(MAX_PENDING_REFRESHES)
+_rss_lock = threading.Lock()
+_rss_checked_at = None
+_rss_paused_until = 0.0
+_NO_KEY = object()
+
+def _get_refresh_pool():
+    global _refresh_pool
+    with _registry_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix='cache-refresh')
+        return _refresh_pool
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+def make_key(args, kwargs):
+    return _freeze(args) + (_freeze(kwargs),) if kwargs else _freeze(args)
+
+# ----------------- Size Accounting -----------------
+def deep_sizeof(obj, _seen=None):
+    """
+    Estimate the memory held by `obj`, following containers and object attributes.
+    DataFrames/Series report their own deep usage; shared objects are counted once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if hasattr(obj, 'memory_usage') and callable(obj.memory_usage):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(obj, 'nbytes') and hasattr(obj, 'dtype'):
+        return max(sys.getsizeof(obj), int(obj.nbytes))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(v, _seen) for v in obj)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), _seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), _seen)
+    return size
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def cached_bytes():
+    return sum(cache.bytes for cache in list(CACHES.values()))
+
+def enforce_rss_ceiling(keep=None):
+    """
+    Evict LRU entries if RSS is over the ceiling. `keep` is a (cache, key) pair
+    that must survive, normally the entry the caller just stored.
+    """
+    global _rss_checked_at, _rss_paused_until
+    if not RSS_CEILING_BYTES:
+        return 0
+    now = time.monotonic()
+    with _rss_lock:
+        if _rss_checked_at is not None and now - _rss_checked_at < RSS_CHECK_INTERVAL:
+            return 0
+        _rss_checked_at = now
+        rss = current_rss()
+        if rss is None or rss <= RSS_CEILING_BYTES or now < _rss_paused_until:
+            return 0
+        budget = min(rss - RSS_CEILING_BYTES, int(cached_bytes() * RSS_EVICT_FRACTION))
+    freed = evict_lru(budget, keep=keep) if budget > 0 else 0
+    if freed:
+        after = current_rss()
+        print(f"⚠ RSS {rss / MB:.0f} MB is over the {RSS_CEILING_BYTES / MB:.0f} MB ceiling; evicted {freed / MB:.1f} MB of cache entries.")
+        if after is None or after >= rss:
+            # The allocator kept the memory, so evicting more would only empty
+            # the caches without lowering RSS. Back off for a while.
+            with _rss_lock:
+                _rss_paused_until = time.monotonic() + RSS_EVICT_COOLDOWN
+    return freed
+
+def evict_lru(nbytes, keep=None):
+    # Evict globally least recently used entries until `nbytes` are accounted freed.
+    freed = 0
+    while freed < nbytes:
+        oldest = None
+        for cache in list(CACHES.values()):
+            skip = keep[1] if keep and keep[0] is cache else _NO_KEY
+            last_used = cache.oldest_last_used(skip)
+            if last_used is not None and (oldest is None or last_used < oldest[0]):
+                oldest = (last_used, cache, skip)
+        if oldest is None:
+            break
+        freed += oldest[1].evict_oldest(oldest[2])
+    return freed
+
+# ----------------- Cache -----------------
+class RefreshQueueFull(Exception):
+    """Raised by peek() when a key is not cached and no refresh can be queued."""
+
+class Entry:
+    __slots__ = ('value', 'loaded_at', 'expires_at', 'size', 'last_used')
+
+    def __init__(self, value, ttl, size):
+        self.value = value
+        self.loaded_at = time.time()
+        self.expires_at = time.monotonic() + ttl
+        self.size = size
+        self.last_used = time.monotonic()
+
+    @property
+    def fresh(self):
+        return time.monotonic() < self.expires_at
+
+    def max_age(self):
+        return max(0, int(self.expires_at - time.monotonic()))
+
+class TTLCache:
+    def __init__(self, name, loader, ttl, max_bytes):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.monotonic()
+            return entry
+
+    def _store(self, key, value):
+        size = deep_sizeof(key) + deep_sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            if size > self.max_bytes:
+                print(f"⚠ Not caching {self.name}{key!r:.80}: {size / MB:.1f} MB exceeds its {self.max_bytes / MB:.1f} MB budget.")
+                return
+            self._entries[key] = Entry(value, self.ttl, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def _claim(self, key):
+        # Only one thread loads a given key; everyone else gets the owner's future.
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _fill(self, key, future, args, kwargs):
+        self.misses += 1
+        try:
+            value = self.loader(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        try:
+            self._store(key, value)
+        except Exception as e:
+            # Sizing walks arbitrary objects; if it fails, serve the value uncached
+            # rather than leave the key claimed forever.
+            print(f"❌ Could not cache {self.name}{key!r:.80}: {e}")
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            future.set_result(value)
+        enforce_rss_ceiling(keep=(self, key))
+        return value
+
+    def _load(self, key, args, kwargs):
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+        return self._fill(key, future, args, kwargs)
+
+    def _refresh_in_background(self, key, args, kwargs):
+        """
+        Queue a refresh for `key`. Returns False, without claiming the key, when
+        MAX_PENDING_REFRESHES are already queued or running.
+        """
+        with self._lock:
+            if key in self._inflight:
+                return True
+        if not _refresh_slots.acquire(blocking=False):
+            return False
+        # The key is claimed before the task is queued, so repeated peeks on a cold
+        # key while the pool is busy still produce a single refresh.
+        future, owner = self._claim(key)
+        if not owner:
+            _refresh_slots.release()
+            return True
+
+        def run():
+            try:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is not None and entry.fresh:
+                    with self._lock:
+                        del self._inflight[key]
+                    future.set_result(entry.value)
+                    return
+                self._fill(key, future, args, kwargs)
+            except Exception as e:
+                print(f"❌ Cache refresh failed for {self.name}{args}: {e}")
+            finally:
+                _refresh_slots.release()
+        _get_refresh_pool().submit(run)
+        return True
+
+    def get(self, *args, **kwargs):
+        key = make_key(args, kwargs)
+        entry = self._touch(key)
+        if entry is not None and entry.fresh:
+            self.hits += 1
+            return entry.value
+        return self._load(key, args, kwargs)
+
+    def peek(self, *args, **kwargs):
+        """
+        Return the cached Entry without waiting on the loader (None if a refresh is
+        pending). Missing or expired keys are refreshed in the background; when the
+        refresh queue is full an expired entry is still returned, but a missing key
+        raises RefreshQueueFull.
+        """
+        key = make_key(args, kwargs)
+        entry = self._touch(key)
+        if entry is not None:
+            self.hits += 1
+        if entry is None or not entry.fresh:
+            queued = self._refresh_in_background(key, args, kwargs)
+            if not queued and entry is None:
+                raise RefreshQueueFull(self.name)
+        return entry
+
+    def _oldest(self, skip):
+        # Caller holds the lock. Stops after at most two items.
+        for key in self._entries:
+            if key != skip:
+                return key
+        return _NO_KEY
+
+    def oldest_last_used(self, skip=_NO_KEY):
+        with self._lock:
+            key = self._oldest(skip)
+            return None if key is _NO_KEY else self._entries[key].last_used
+
+    def evict_oldest(self, skip=_NO_KEY):
+        with self._lock:
+            key = self._oldest(skip)
+            if key is _NO_KEY:
+                return 0
+            entry = self._entries.pop(key)
+            self.bytes -= entry.size
+            self.evictions += 1
+            return entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def report(self, top=10):
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.items())
+        largest = sorted(entries, key=lambda item: item[1].size, reverse=True)[:top]
+        return {
+            'name': self.name,
+            'ttl': self.ttl,
+            'entries': len(entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'keys': [{'key': repr(key)[:120], 'bytes': entry.size, 'idle_seconds': round(now - entry.last_used, 1), 'fresh': entry.fresh} for key, entry in largest],
+        }
+
+def memory_report(top=10):
+    """
+    Snapshot of process RSS and every cache's accounted size, largest keys first.
+    """
+    caches = sorted((cache.report(top) for cache in list(CACHES.values())), key=lambda r: r['bytes'], reverse=True)
+    return {
+        'rss_bytes': current_rss(),
+        'rss_ceiling_bytes': RSS_CEILING_BYTES or None,
+        'cached_bytes': cached_bytes(),
+        'caches': caches,
+    }
+
+def cached(name=None, ttl=None, max_bytes=None):
+    """
+    Decorator: cache a function's results under the TTL and size budget configured
+    for its name in CACHE_CONFIG. The wrapper blocks like st.cache_data;
+    `wrapper.peek(...)` is the non-blocking variant.
+    """
+    def decorator(func):
+        cache_name = name or func.__name__
+        config = CACHE_CONFIG.get(cache_name, {})
+        cache_ttl = ttl or config.get('ttl', DEFAULT_TTL)
+        cache_max_bytes = max_bytes or config.get('max_bytes', DEFAULT_MAX_BYTES)
+        with _registry_lock:
+            # Streamlit re-executes app.py on every rerun; reuse the existing cache.
+            cache = CACHES.get(cache_name)
+            if cache is None:
+                cache = CACHES[cache_name] = TTLCache(cache_name, func, cache_ttl, cache_max_bytes)
+            else:
+                cache.loader, cache.ttl, cache.max_bytes = func, cache_ttl, cache_max_bytes
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get(*args, **kwargs)
+        wrapper.peek = cache.peek
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,92 @@
+from pytrends.request import TrendReq
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+import re
+import yfinance as yf
+from collections import Counter
+import numpy as np
+
+# Backend logic shared by the Streamlit dashboard (app.py) and the headless
+# workers. Nothing in here may import streamlit; app.py adds its own caching.
+
+analyzer = SentimentIntensityAnalyzer()
+
+REQUEST_TIMEOUT = 15
+
+GEO_COUNTRIES = {'US': 'United States', 'GB': 'United Kingdom', 'CA': 'Canada', 'AU': 'Australia', 'IN': 'India'}
+COUNTRY_CODES_MAP = {'US': 'USA', 'GB': 'GBR', 'CA': 'CAN', 'AU': 'AUS', 'IN': 'IND'}
+
+def categorize_sentiment(score):
+    return "Positive" if score > 0.1 else "Negative" if score < -0.1 else "Neutral"
+
+def fetch_google_trends(keywords, timeframe='today 1-m', geo=''):
+    if not keywords:
+        return None
+    pytrends = TrendReq(hl='en-US', tz=330, timeout=(REQUEST_TIMEOUT, REQUEST_TIMEOUT))
+    try:
+        pytrends.build_payload(list(keywords), cat=0, timeframe=timeframe, geo=geo, gprop='')
+        data = pytrends.interest_over_time()
+        if 'isPartial' in data.columns:
+            data = data.drop(columns=['isPartial'])
+        return data
+    except Exception:
+        return None
+
+def fetch_news_data(keyword, geo='US', raise_errors=False):
+    # The dashboard treats a failed fetch as "no news"; the monitor passes
+    # raise_errors=True so it can tell the two apart.
+    news_items = []
+    try:
+        url = f"https://news.google.com/rss/search?q={keyword}&hl=en-{geo}&gl={geo}&ceid={geo}:en"
+        res = requests.get(url, timeout=REQUEST_TIMEOUT)
+        res.raise_for_status()
+        soup = BeautifulSoup(res.content, features="xml")
+        items = soup.find_all('item')
+        for item in items:
+            title = item.title.text
+            link = item.link.text
+            description = BeautifulSoup(item.description.text, "html.parser").get_text()
+            clean_desc = re.sub(r'\s+', ' ', description).strip()
+            if len(clean_desc) > 250:
+                clean_desc = clean_desc[:247] + "..."
+            combined_text = f"{title} {clean_desc}"
+            sentiment_score = analyzer.polarity_scores(combined_text)["compound"]
+            news_items.append({'title': title, 'link': link, 'description': clean_desc, 'sentiment_category': categorize_sentiment(sentiment_score), 'sentiment_score': sentiment_score, 'source': item.source.text if item.source else 'N/A', 'published': item.pubDate.text if item.pubDate else None})
+    except Exception:
+        if raise_errors:
+            raise
+        return []
+    return news_items
+
+def fetch_stock_data(tickers, period='1y'):
+    try:
+        tickers_str = " ".join(tickers)
+        if not tickers_str:
+            return None
+        data = yf.download(tickers_str, period=period, group_by='ticker', auto_adjust=True)
+        return data if not data.empty else None
+    except Exception:
+        return None
+
+def get_close_prices(stock_data):
+    if isinstance(stock_data.columns, pd.MultiIndex):
+        return stock_data.xs('Close', level=1, axis=1)
+    return stock_data[['Close']]
+
+def get_sentiment_summary(news_items):
+    counts = Counter(item['sentiment_category'] for item in news_items)
+    total = sum(counts.values())
+    return {k: round((counts.get(k, 0) / total) * 100, 1) if total > 0 else 0 for k in ["Positive", "Neutral", "Negative"]}
+
+def get_geo_sentiment(keyword, fetch=fetch_news_data):
+    # `fetch` lets callers route the per-country lookups through their own cache.
+    geo_data = []
+    for code, name in GEO_COUNTRIES.items():
+        news = fetch(keyword, geo=code)
+        if news:
+            summary_cats = get_sentiment_summary(news)
+            avg_score = np.mean([item['sentiment_score'] for item in news])
+            geo_data.append({'country': name, 'iso_alpha': COUNTRY_CODES_MAP.get(code), **summary_cats, 'avg_score': avg_score})
+    return pd.DataFrame(geo_data) if geo_data else None
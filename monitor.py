@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import json
+import math
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+import requests
+
+import market_data
+
+# Headless watchlist monitor: polls Google News for every keyword/country pair,
+# scores only articles it has not seen before and keeps running EWMA statistics
+# so that a shift towards negative coverage raises an alert without the dashboard.
+#
+#   python monitor.py watchlist.txt --interval 900 --sink alerts.jsonl
+
+ALL_COUNTRIES = '*'
+
+# Article fingerprints remembered per country stream (a few feeds' worth, since a
+# search feed is ranked by relevance and items drop out and come back). The
+# combined stream gets this many per country.
+SEEN_PER_STREAM = 500
+
+def article_digest(article):
+    # 8-byte fingerprint of an article; the link is stable across polls.
+    key = article['link'] or article['title']
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class StreamStats:
+    """
+    Running sentiment statistics for one keyword/country stream.
+    Memory is fixed per stream: a few floats plus at most `max_seen` fingerprints.
+    """
+    __slots__ = ('mean', 'var', 'count', 'seen', 'max_seen')
+
+    def __init__(self, max_seen=SEEN_PER_STREAM):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self.seen = array('Q')
+        self.max_seen = max_seen
+
+    def new_articles(self, articles):
+        # `seen` is ordered least recently seen first. Everything in the current
+        # feed moves to the end, so an item that drops out for a few polls and
+        # comes back is still recognised until `max_seen` newer items push it out.
+        # An empty feed says nothing about the window, so it leaves `seen` as is.
+        if not articles:
+            return []
+        previous = set(self.seen)
+        current = {}
+        fresh = []
+        for article in articles:
+            digest = article_digest(article)
+            if digest in current:
+                continue
+            current[digest] = None
+            if digest not in previous:
+                fresh.append(article)
+        seen = array('Q', (d for d in self.seen if d not in current))
+        seen.extend(current)
+        self.seen = seen[-self.max_seen:]
+        return fresh
+
+    def update(self, score, alpha):
+        # Incremental exponentially weighted mean and variance (West, 1979).
+        if self.count == 0:
+            self.mean = score
+        else:
+            diff = score - self.mean
+            incr = alpha * diff
+            self.mean += incr
+            self.var = (1 - alpha) * (self.var + diff * incr)
+        self.count += 1
+
+    def zscore(self, batch_mean, batch_size, min_std):
+        std = max(math.sqrt(self.var), min_std)
+        return (batch_mean - self.mean) / (std / math.sqrt(batch_size))
+
+class FileSink:
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, alert):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(alert) + '\n')
+        except OSError as e:
+            print(f"❌ Could not write alert to {self.path}: {e}")
+
+class WebhookSink:
+    def __init__(self, url):
+        self.url = url
+
+    def emit(self, alert):
+        try:
+            requests.post(self.url, json=alert, timeout=market_data.REQUEST_TIMEOUT).raise_for_status()
+        except Exception as e:
+            print(f"❌ Webhook delivery failed: {e}")
+
+def make_sink(target):
+    if target.startswith(('http://', 'https://')):
+        return WebhookSink(target)
+    return FileSink(target)
+
+class WatchlistMonitor:
+    def __init__(self, sink, countries=None, alpha=0.1, z_threshold=3.0, negative_threshold=-0.1, warmup=20, min_articles=3, min_std=0.05):
+        self.sink = sink
+        self.countries = list(countries or market_data.GEO_COUNTRIES)
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.negative_threshold = negative_threshold
+        self.warmup = warmup
+        self.min_articles = min_articles
+        self.min_std = min_std
+        self.streams = {}
+
+    def stream(self, keyword, geo):
+        key = (keyword, geo)
+        stats = self.streams.get(key)
+        if stats is None:
+            max_seen = SEEN_PER_STREAM * len(self.countries) if geo == ALL_COUNTRIES else SEEN_PER_STREAM
+            stats = self.streams[key] = StreamStats(max_seen)
+        return stats
+
+    def prune(self, keywords):
+        # Drop state for keywords that were removed from the watchlist.
+        keep = set(keywords)
+        for key in [k for k in self.streams if k[0] not in keep]:
+            del self.streams[key]
+
+    def process(self, keyword, feeds):
+        # `feeds` maps country -> articles for one poll; failed fetches are absent.
+        alerts = []
+        for geo, articles in feeds.items():
+            fresh = self.stream(keyword, geo).new_articles(articles)
+            if fresh:
+                alerts += self.observe(keyword, geo, fresh)
+        # The combined stream keeps its own bounded seen history over all countries,
+        # so an article syndicated to several country feeds is counted once, and a
+        # country that failed this poll keeps its digests there until they age out.
+        combined = self.stream(keyword, ALL_COUNTRIES)
+        fresh = combined.new_articles([a for articles in feeds.values() for a in articles])
+        if fresh:
+            alerts += self.observe(keyword, ALL_COUNTRIES, fresh)
+        for alert in alerts:
+            self.sink.emit(alert)
+        return alerts
+
+    def observe(self, keyword, geo, articles):
+        stats = self.stream(keyword, geo)
+        scores = [a['sentiment_score'] for a in articles]
+        batch_mean = sum(scores) / len(scores)
+        # Alerts need a baseline from earlier polls; the batch that completes
+        # warmup (typically the first poll after a start) only builds it.
+        established = stats.count >= self.warmup
+        alerts = []
+        if established and len(scores) >= self.min_articles:
+            z = stats.zscore(batch_mean, len(scores), self.min_std)
+            if z <= -self.z_threshold and batch_mean < 0:
+                alerts.append(self.make_alert('sentiment_drop', keyword, geo, stats, batch_mean, articles, z=z))
+        baseline = stats.mean
+        for score in scores:
+            stats.update(score, self.alpha)
+        if established and baseline >= self.negative_threshold and stats.mean < self.negative_threshold:
+            alerts.append(self.make_alert('turned_negative', keyword, geo, stats, batch_mean, articles, baseline=baseline))
+        return alerts
+
+    def make_alert(self, kind, keyword, geo, stats, batch_mean, articles, **extra):
+        worst = sorted(articles, key=lambda a: a['sentiment_score'])[:3]
+        return {
+            'type': kind,
+            'keyword': keyword,
+            'country': geo,
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'batch_mean': round(batch_mean, 4),
+            'batch_size': len(articles),
+            'ewma': round(stats.mean, 4),
+            'ewma_std': round(math.sqrt(stats.var), 4),
+            **{k: round(v, 4) for k, v in extra.items()},
+            'articles': [{'title': a['title'], 'link': a['link'], 'published': a.get('published'), 'sentiment_score': a['sentiment_score']} for a in worst],
+        }
+
+    def poll(self, keywords, workers=8):
+        # Keep at most a few requests per worker in flight so memory stays flat
+        # regardless of how long the watchlist is. Jobs are keyword-major, so only
+        # the keywords currently in flight have their feeds buffered.
+        pending = {}
+        feeds = {}
+        remaining = {}
+        jobs = ((k, g) for k in dict.fromkeys(keywords) for g in self.countries)
+        fetched = failed = alerts = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                for keyword, geo in jobs:
+                    # A keyword is complete only once all its countries have finished;
+                    # submission may pause partway through its jobs.
+                    remaining.setdefault(keyword, len(self.countries))
+                    pending[pool.submit(market_data.fetch_news_data, keyword, geo=geo, raise_errors=True)] = (keyword, geo)
+                    if len(pending) >= workers * 4:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    keyword, geo = pending.pop(future)
+                    try:
+                        feeds.setdefault(keyword, {})[geo] = future.result()
+                        fetched += 1
+                    except Exception as e:
+                        # Skip the stream for this poll; its state is left untouched.
+                        print(f"❌ Error fetching news for '{keyword}' ({geo}): {e}")
+                        failed += 1
+                    remaining[keyword] -= 1
+                    if not remaining[keyword]:
+                        del remaining[keyword]
+                        alerts += len(self.process(keyword, feeds.pop(keyword, {})))
+        return fetched, failed, alerts
+
+def load_watchlist(path):
+    with open(path, encoding='utf-8') as f:
+        keywords = [line.strip() for line in f]
+    return list(dict.fromkeys(k for k in keywords if k and not k.startswith('#')))
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll a watchlist of brands and alert on negative sentiment shifts.")
+    parser.add_argument('watchlist', help="Text file with one keyword per line (re-read every poll).")
+    parser.add_argument('--sink', default='alerts.jsonl', help="JSONL file to append alerts to, or an http(s) webhook URL.")
+    parser.add_argument('--interval', type=int, default=900, help="Seconds between polls.")
+    parser.add_argument('--countries', default=','.join(market_data.GEO_COUNTRIES), help="Comma-separated country codes.")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent news requests.")
+    parser.add_argument('--alpha', type=float, default=0.1, help="EWMA smoothing factor per article.")
+    parser.add_argument('--z-threshold', type=float, default=3.0, help="Alert when a batch falls this many standard errors below the EWMA.")
+    parser.add_argument('--warmup', type=int, default=20, help="Articles needed before a stream can alert.")
+    parser.add_argument('--once', action='store_true', help="Run a single poll and exit (for cron).")
+    args = parser.parse_args()
+
+    monitor = WatchlistMonitor(make_sink(args.sink), countries=[c.strip().upper() for c in args.countries.split(',') if c.strip()], alpha=args.alpha, z_threshold=args.z_threshold, warmup=args.warmup)
+    keywords = []
+    while True:
+        started = time.monotonic()
+        try:
+            keywords = load_watchlist(args.watchlist)
+            monitor.prune(keywords)
+        except OSError as e:
+            # The file may be mid-rewrite; keep polling the last list we read.
+            print(f"❌ Could not read watchlist {args.watchlist}: {e}")
+        try:
+            fetched, failed, alerts = monitor.poll(keywords, workers=args.workers)
+            print(f"📡 Polled {fetched} feeds ({failed} failed) for {len(keywords)} keywords in {time.monotonic() - started:.1f}s, {alerts} alert(s).")
+        except Exception as e:
+            print(f"❌ Poll failed: {e}")
+        elapsed = time.monotonic() - started
+        if args.once:
+            break
+        time.sleep(max(0, args.interval - elapsed))
+
+if __name__ == "__main__":
+    main()